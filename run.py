@@ -14,64 +14,116 @@ Medical AI Advisor 실행 스크립트
 
 출력: run.py에서 프롬프트의 output가이드라인을 따라서 최종결과 출력
 
+서버 모드: server.py(POST /query)가 실행 중이면 --server 옵션으로 해당 서버에 질문을 전달
+    python run.py --server http://localhost:8000
+
 """
 
+import argparse
 import os
 import sys
+import threading
 import time
+import requests
 from dotenv import load_dotenv
 
-from src.retrieval.embeddings import SolarEmbedder
-from src.retrieval.vector_store import FaissIndex
+from src.retrieval.resources import load_resources
 from src.retrieval.retriever import get_relevant_context
 from src.llm.solver import run_multidisciplinary_debate
 
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
-load_dotenv()
 
 # ---------------------------------------------------
-# 1. 데이터 경로 설정 (단일 경로 통합)
+# 1. 리소스 로딩 함수
 # ---------------------------------------------------
-INDEX_PATH = "data/Cancer_cell_merged.faiss"
-META_PATH = "data/Cancer_cell_merged.jsonl"
+def load_cli_resources():
+    # .env 로드 (CLI 로컬 모드에서 프로세스당 한 번)
+    load_dotenv()
 
-# ---------------------------------------------------
-# 2. 리소스 로딩 함수
-# ---------------------------------------------------
-def load_resources():
-    print("\n[System] Initializing Medical AI Advisor...")
-    
-    # 1. 임베더 로딩
-    print("[System] Loading Embedder (Solar)...")
+    # 임베더 로딩 실패 시 CLI는 종료
     try:
-        embedder = SolarEmbedder()
+        return load_resources()
     except Exception as e:
         print(f"[Critical Error] Embedder 로딩 실패: {e}")
         sys.exit(1)
 
-    # 2. Vector DB 로딩
-    vector_db = None
-    
-    if os.path.exists(INDEX_PATH) and os.path.exists(META_PATH):
-        print(f"[System] Loading Vector DB form {INDEX_PATH}...")
-        try:
-            vector_db = FaissIndex(INDEX_PATH, META_PATH)
-        except Exception as e:
-            print(f"[Error] DB 로딩 중 오류 발생: {e}")
-            vector_db = None
-    else:
-        print(f"[Warning] DB 파일을 찾을 수 없습니다 ({INDEX_PATH}). 검색 기능 없이 실행됩니다.")
-
-    print("[System] Initialization Complete.\n")
-    
-    return embedder, vector_db
-
 # ---------------------------------------------------
-# 3. 메인 실행 루프
+# 2. 메인 실행 루프
 # ---------------------------------------------------
 
+def print_opinions(reports):
+    print("\n" + "="*70)
+    print("<Tumor Board Report>")
+    print("="*70)
+
+    #각 전문가 의견 요약 출력
+    print("\n[1. Mechanism Opinion]")
+    print(reports["mechanism"][:500] + "...\n(See full logs for details)")
+
+    print("\n[2. Clinical Opinion]")
+    print(reports["clinical"][:500] + "...\n(See full logs for details)")
+
+    print("\n[3. Safety Opinion]")
+    print(reports["safety"][:500] + "...\n(See full logs for details)")
+
+def print_verdict_header():
+    print("\n" + "*"*70)
+    print("[CHIEF ONCOLOGIST FINAL VERDICT]")
+    print("*"*70)
+
+def print_report(debate_result):
+    print_opinions(debate_result)
+
+    # 최종 결론 출력
+    print_verdict_header()
+    print(debate_result["final_verdict"])
+    print("*"*70)
+
+def make_stream_printer():
+    """
+    토론 스트리밍 콜백 생성
+    - 전문가: 첫 토큰 도착 시 응답 시작만 알림 (동시 출력으로 섞이지 않도록)
+    - 전문가 리포트 완성 시: 의견 요약과 최종 결론 헤더 출력
+    - 의장: 최종 결론 토큰을 도착하는 대로 화면에 출력
+    반환: (on_token, on_reports, finish) - finish(debate_result)로 출력 마무리
+    """
+    started = set()
+    streamed = []
+    lock = threading.Lock()
+
+    def on_token(role, token):
+        with lock:
+            if role == "moderator":
+                streamed.append(token)
+                print(token, end="", flush=True)
+            elif role not in started:
+                started.add(role)
+                print(f"   [Debate] {role.capitalize()} Specialist is responding...")
+
+    def on_reports(reports):
+        print_opinions(reports)
+        print_verdict_header()
+
+    def finish(debate_result):
+        final_verdict = debate_result["final_verdict"]
+        # 스트리밍된 내용이 없거나 실패로 최종 결론과 다르면 최종 결론을 그대로 출력
+        if "".join(streamed) != final_verdict:
+            if streamed:
+                print()
+            print(final_verdict, end="")
+        print("\n" + "*"*70)
+
+    return on_token, on_reports, finish
+
 def main():
-    embedder, vector_db= load_resources()
+    parser = argparse.ArgumentParser(description="Multi-Agent Cancer Tumor Board AI")
+    parser.add_argument("--server", default=None, help="질문을 전달할 API 서버 주소 (예: http://localhost:8000)")
+    args = parser.parse_args()
+
+    if args.server:
+        embedder, vector_db = None, None
+    else:
+        embedder, vector_db = load_cli_resources()
 
     print("="*70)
     print("    Multi-Agent Cancer Tumor Board AI (Debate Mode)")
@@ -89,42 +141,40 @@ def main():
 
             start_time = time.time()
 
-            # 1. 검색 (Retrieval) - 모든 전문가가 공유할 Context
-            print("   ↳ [Retriever] Searching clinical guidelines & papers...")
-            context = get_relevant_context(
-                query=user_query,
-                embedder=embedder,
-                vector_db=vector_db,
-                use_wiki=True
-            )
-
-            # 2. 토론 실행 (Solver)
-            print("   ↳ [Solver] Running multidisciplinary debate...")
-            debate_result = run_multidisciplinary_debate(user_query, context)
+            if args.server:
+                # 서버 모드: 검색과 토론을 서버에 위임
+                print(f"   ↳ [Client] Sending query to {args.server}...")
+                resp = requests.post(
+                    f"{args.server.rstrip('/')}/query",
+                    json={"query": user_query, "use_wiki": True},
+                    timeout=300
+                )
+                resp.raise_for_status()
+                debate_result = resp.json()
+            else:
+                # 1. 검색 (Retrieval) - 모든 전문가가 공유할 Context
+                print("   ↳ [Retriever] Searching clinical guidelines & papers...")
+                context = get_relevant_context(
+                    query=user_query,
+                    embedder=embedder,
+                    vector_db=vector_db,
+                    use_wiki=True
+                )
+
+                # 2. 토론 실행 (Solver)
+                print("   ↳ [Solver] Running multidisciplinary debate...")
+                # 3. 결과 출력: 전문가 의견 요약 후 최종 결론은 생성되는 대로 스트리밍 출력
+                on_token, on_reports, finish = make_stream_printer()
+                debate_result = run_multidisciplinary_debate(
+                    user_query, context, on_token=on_token, on_reports=on_reports
+                )
+                finish(debate_result)
 
             elapsed = time.time() - start_time
 
-            # 3. 결과 출력
-            print("\n" + "="*70)
-            print(f"<Tumor Board Report>")
-            print("="*70)
-
-            #각 전문가 의견 요약 출력
-            print("\n[1. Mechanism Opinion]")
-            print(debate_result["mechanism"][:500] + "...\n(See full logs for details)")
-
-            print("\n[2. Clinical Opinion]")
-            print(debate_result["clinical"][:500] + "...\n(See full logs for details)")
-
-            print("\n[3. Safety Opinion]")
-            print(debate_result["safety"][:500] + "...\n(See full logs for details)")
-
-            # 최종 결론 출력
-            print("\n" + "*"*70)
-            print("[CHIEF ONCOLOGIST FINAL VERDICT]")
-            print("*"*70)
-            print(debate_result["final_verdict"])
-            print("*"*70)
+            # 3. 결과 출력 (서버 모드)
+            if args.server:
+                print_report(debate_result)
 
         except KeyboardInterrupt:
             break
@@ -0,0 +1,68 @@
+"""
+Medical AI Advisor API 서버
+- run.py의 파이프라인(검색 -> 토론 -> 종합)을 POST /query 엔드포인트로 제공
+- 임베더와 Vector DB는 서버 시작 시 한 번만 로딩하여 모든 요청이 공유
+- 동시에 들어온 질문 임베딩은 MicroBatchEmbedder가 10ms 단위로 묶어서 처리
+
+실행:
+    uvicorn server:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from src.retrieval.embeddings import MicroBatchEmbedder
+from src.retrieval.resources import load_resources
+from src.retrieval.retriever import get_relevant_context
+from src.llm.solver import run_multidisciplinary_debate
+
+os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+
+
+class QueryRequest(BaseModel):
+    query: str
+    use_wiki: bool = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # .env 로드 (서버 프로세스당 한 번). 임베더 로딩 실패 시 예외로 서버 시작 중단
+    load_dotenv()
+    embedder, vector_db = load_resources()
+    app.state.embedder = MicroBatchEmbedder(embedder, window_ms=10.0)
+    app.state.vector_db = vector_db
+    yield
+
+
+app = FastAPI(title="Multi-Agent Cancer Tumor Board AI", lifespan=lifespan)
+
+
+@app.post("/query")
+async def query(req: QueryRequest) -> Dict[str, str]:
+    """
+    질문 하나에 대해 검색 + 다학제 토론을 수행하고 각 전문가 의견과 최종 결론을 반환합니다.
+    """
+    embedder = app.state.embedder
+    vector_db = app.state.vector_db
+
+    def _pipeline() -> Dict[str, str]:
+        start_time = time.time()
+        context = get_relevant_context(
+            query=req.query,
+            embedder=embedder,
+            vector_db=vector_db,
+            use_wiki=req.use_wiki
+        )
+        result = run_multidisciplinary_debate(req.query, context)
+        result["elapsed"] = f"{time.time() - start_time:.1f}s"
+        return result
+
+    # 블로킹 I/O(임베딩/LLM 호출)는 워커 스레드에서 실행하여 이벤트 루프를 막지 않음
+    return await asyncio.to_thread(_pipeline)
@@ -7,6 +7,7 @@ LLM 프롬프트 템플릿 정의 모듈
 - RAG로 검색된 의학 논문/가이드라인(Context) 기반 답변 생성
 """
 
+import sys
 from typing import Dict
 
 # ------------------------------------------------
@@ -145,17 +146,6 @@ Follow this thought process:
 (Brief opinion on whether the benefit outweighs the risk based on the data.)
 """
 
-# ------------------------------------------------
-# 4. Dictionary Mapping (Main Export)
-# ------------------------------------------------
-
-AGENT_PROMPTS: Dict[str, str] = {
-    "mechanism": MECHANISM_PROMPT,
-    "clinical": CLINICAL_PROMPT,
-    "safety": SAFETY_PROMPT,
-    "general": CLINICAL_PROMPT 
-}
-
 # ------------------------------------------------
 # 4. Moderator Agent (토론 종합 및 최종 결정자)
 # ------------------------------------------------
@@ -202,9 +192,19 @@ Provide a final summary in the following format:
 (Bullet points of what the treating physician must watch out for.)
 """
 
-AGENT_PROMPTS = {
+# ------------------------------------------------
+# 5. Dictionary Mapping (Main Export)
+# ------------------------------------------------
+
+# 프롬프트 문자열은 모듈 로드 시 한 번만 만들어지므로 intern 하여 재사용
+MECHANISM_PROMPT = sys.intern(MECHANISM_PROMPT)
+CLINICAL_PROMPT = sys.intern(CLINICAL_PROMPT)
+SAFETY_PROMPT = sys.intern(SAFETY_PROMPT)
+MODERATOR_PROMPT = sys.intern(MODERATOR_PROMPT)
+
+AGENT_PROMPTS: Dict[str, str] = {
     "mechanism": MECHANISM_PROMPT,
     "clinical": CLINICAL_PROMPT,
     "safety": SAFETY_PROMPT,
-    "moderator": MODERATOR_PROMPT 
-}
\ No newline at end of file
+    "moderator": MODERATOR_PROMPT
+}
@@ -1,62 +1,124 @@
 # src/llm/solver.py
 
+import hashlib
+import json
 import os
+import threading
 import requests
-import yaml
-from typing import Dict
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional, Tuple
 
 from src.llm.prompts import AGENT_PROMPTS
+from src.utils.config import CONFIG_PATH, get_upstage_setting
+from src.utils.session import SESSION
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
 
-load_dotenv()
 
 # ------------------------------------------------
 # 1. Upstage API 설정
 # ------------------------------------------------
 
-CONFIG_PATH = "configs.yaml"
-
-if os.path.exists(CONFIG_PATH):
-    with open("configs.yaml", "r", encoding="utf-8") as f:
-        _cfg = yaml.safe_load(f)
-else:
-    _cfg = {
-        "upstage": {
-            "base_url": "https://api.upstage.ai/v1/chat/completions",
-            "model_name": "solar-pro2",
-        }
-    }
+# API Key 등 환경 변수(.env)는 진입점(run.py/server.py)에서 로드하며 호출 시점에 읽음
+DEFAULT_USER_AGENT = "medical-ai-advisor/1.0"
 
-UPSTAGE_API_KEY = os.getenv("UPSTAGE_API_KEY")
-USER_AGENT = os.getenv("USER_AGENT", "medical-ai-advisor/1.0")
-BASE_URL = _cfg["upstage"]["base_url"]
-MODEL_NAME = _cfg["upstage"]["model_name"]
 
+def get_base_url() -> str:
+    return get_upstage_setting("base_url")
 
-def call_solar(prompt: str, temperature: float = 0.1, max_tokens: int = 1500) -> str:
+
+def get_model_name() -> str:
+    return get_upstage_setting("model_name")
+
+
+# 동일한 프롬프트(역할 + Context + 질문)에 대한 응답을 디스크에 캐싱
+# 캐시 디렉터리도 프로젝트 루트 기준이며, 첫 사용 시점에 생성
+LLM_CACHE_DIR = os.path.join(os.path.dirname(CONFIG_PATH), ".cache", "llm")
+_LLM_CACHE = None
+_LLM_CACHE_LOCK = threading.Lock()
+
+
+def _get_llm_cache():
     """
-    Upstage Chat 모델 호출 래퍼
+    LLM 응답 디스크 캐시 (LRU 방출). diskcache가 없으면 None.
     """
-    if UPSTAGE_API_KEY is None:
+    global _LLM_CACHE
+    if diskcache is None:
+        return None
+    with _LLM_CACHE_LOCK:
+        if _LLM_CACHE is None:
+            _LLM_CACHE = diskcache.Cache(LLM_CACHE_DIR, eviction_policy="least-recently-used")
+    return _LLM_CACHE
+
+
+def _llm_cache_key(prompt: str, temperature: float, max_tokens: int) -> str:
+    # 긴 프롬프트는 blake2b로 먼저 축약한 뒤 호출 파라미터와 함께 키 생성
+    prompt_digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=32).hexdigest()
+    raw_key = f"{get_model_name()}|{temperature}|{max_tokens}|{prompt_digest}"
+    return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+
+def _disk_cached(func):
+    """
+    call_solar 응답 캐시 데코레이터 (API 오류 응답은 캐싱하지 않음)
+    """
+    @wraps(func)
+    def wrapper(prompt: str, temperature: float = 0.1, max_tokens: int = 1500) -> str:
+        cache = _get_llm_cache()
+        if cache is None:
+            return func(prompt, temperature=temperature, max_tokens=max_tokens)
+
+        key = _llm_cache_key(prompt, temperature, max_tokens)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        content = func(prompt, temperature=temperature, max_tokens=max_tokens)
+        if not content.startswith("[API Error]"):
+            cache.set(key, content)
+        return content
+
+    return wrapper
+
+
+def _build_request(prompt: str, temperature: float, max_tokens: int) -> Tuple[Dict, Dict]:
+    """
+    Upstage Chat API 요청 헤더/본문 생성
+    """
+    api_key = os.getenv("UPSTAGE_API_KEY")
+    if api_key is None:
         raise RuntimeError("UPSTAGE_API_KEY is not set. Check your .env file.")
 
     headers = {
-        "Authorization": f"Bearer {UPSTAGE_API_KEY}",
+        "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
-        "User-Agent": USER_AGENT,
+        "User-Agent": os.getenv("USER_AGENT", DEFAULT_USER_AGENT),
     }
 
     payload = {
-        "model": MODEL_NAME,
+        "model": get_model_name(),
         "messages": [
             {"role": "user", "content": prompt}
         ],
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
+    return headers, payload
+
+
+@_disk_cached
+def call_solar(prompt: str, temperature: float = 0.1, max_tokens: int = 1500) -> str:
+    """
+    Upstage Chat 모델 호출 래퍼
+    """
+    headers, payload = _build_request(prompt, temperature, max_tokens)
 
     try:
-        resp = requests.post(BASE_URL, headers=headers, json=payload, timeout=60)
+        resp = SESSION.post(get_base_url(), headers=headers, json=payload, timeout=60)
         resp.raise_for_status()
         data = resp.json()
         content = data["choices"][0]["message"]["content"]
@@ -65,18 +127,80 @@ def call_solar(prompt: str, temperature: float = 0.1, max_tokens: int = 1500) ->
         return f"[API Error] {str(e)}"
 
 
+def call_solar_stream(prompt: str, temperature: float = 0.1, max_tokens: int = 1500) -> Iterator[str]:
+    """
+    Upstage Chat 모델 스트리밍 호출 래퍼
+    - SSE(data: ...) 응답의 토큰 조각을 도착하는 대로 yield
+    - 캐시에 있으면 전체 응답을 한 번에 yield
+    - 스트림 도중 실패하면 예외를 그대로 발생 (부분 응답은 호출 측에서 폐기)
+    """
+    key = _llm_cache_key(prompt, temperature, max_tokens)
+    cache = _get_llm_cache()
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    headers, payload = _build_request(prompt, temperature, max_tokens)
+    payload["stream"] = True
+
+    chunks = []
+    with SESSION.post(get_base_url(), headers=headers, json=payload, timeout=60, stream=True) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            # SSE 응답은 charset이 없을 수 있으므로 직접 UTF-8 디코딩
+            line = line.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            # usage만 담긴 이벤트 등 choices/content가 없는 이벤트는 건너뜀
+            choices = json.loads(data).get("choices") or []
+            if not choices:
+                continue
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                chunks.append(delta)
+                yield delta
+
+    if cache is not None and chunks:
+        cache.set(key, "".join(chunks))
+
+
 # ------------------------------------------------
 # 2. Debate Logic (토론 시뮬레이션)
 # ------------------------------------------------
 
 def run_multidisciplinary_debate(
     query: str,
-    context: str
+    context: str,
+    on_token: Optional[Callable[[str, str], None]] = None,
+    on_reports: Optional[Callable[[Dict[str, str]], None]] = None
 ) -> Dict[str, str]:
     """
     3명의 전문가(기전, 임상, 안전성)가 각자 리포트를 작성하고,
     마지막에 의장(Moderator)이 이를 종합하여 최종 답변을 생성합니다.
+    on_token이 주어지면 스트리밍으로 호출하고, 토큰이 도착할 때마다
+    on_token(role, token)을 호출합니다. (전문가 호출은 여러 스레드에서 동시에 호출됨)
+    on_reports는 전문가 리포트 3개가 모두 완성된 뒤, 의장 호출 직전에 호출됩니다.
     """
+
+    def _generate(role: str, prompt: str, max_tokens: int) -> str:
+        if on_token is None:
+            return call_solar(prompt, temperature=0.1, max_tokens=max_tokens)
+
+        parts = []
+        try:
+            for token in call_solar_stream(prompt, temperature=0.1, max_tokens=max_tokens):
+                on_token(role, token)
+                parts.append(token)
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            # 도중에 끊긴 부분 응답은 정상 리포트로 쓰지 않고 전체를 실패로 처리
+            return f"[API Error] {str(e)}"
+        return "".join(parts)
     
     reports = {}
     
@@ -85,23 +209,30 @@ def run_multidisciplinary_debate(
     
     print(f"\n   [Debate] Convening Tumor Board for: '{query}'")
 
-    for role in specialists:
+    def _consult(role: str) -> str:
         print(f"   [Debate] Consulting {role.capitalize()} Specialist...")
-        
+
         # 각 전문가용 프롬프트 로드
         prompt_template = AGENT_PROMPTS.get(role)
         if not prompt_template:
-            reports[role] = "Error: Prompt template not found."
-            continue
+            return "Error: Prompt template not found."
 
         final_prompt = prompt_template.format(context=context, question=query)
-        
+
         # LLM 호출
-        response = call_solar(final_prompt, temperature=0.1, max_tokens=1000)
-        reports[role] = response
+        return _generate(role, final_prompt, max_tokens=1000)
+
+    # 세 전문가 호출은 서로 독립적이므로 동시에 요청
+    with ThreadPoolExecutor(max_workers=len(specialists)) as executor:
+        futures = {role: executor.submit(_consult, role) for role in specialists}
+        for role, future in futures.items():
+            reports[role] = future.result()
 
     # 2. 의장(Moderator) 종합
     print(f"   [Debate] Chief Oncologist is synthesizing the final verdict...")
+
+    if on_reports is not None:
+        on_reports(dict(reports))
     
     moderator_template = AGENT_PROMPTS.get("moderator")
     if moderator_template:
@@ -111,7 +242,7 @@ def run_multidisciplinary_debate(
             clinical_report=reports.get("clinical", ""),
             safety_report=reports.get("safety", "")
         )
-        final_verdict = call_solar(moderator_prompt, temperature=0.1, max_tokens=1500)
+        final_verdict = _generate("moderator", moderator_prompt, max_tokens=1500)
     else:
         final_verdict = "Error: Moderator prompt not found."
 
@@ -1,32 +1,91 @@
 # # src/retrieval/embeddings.py
 
 import os
+import queue
+import threading
+import time
 import numpy as np
-from typing import List, Union
-from dotenv import load_dotenv
-from langchain_upstage import UpstageEmbeddings
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Union
+
+from src.utils.config import get_upstage_setting
+from src.utils.session import SESSION
 
 class SolarEmbedder:
     """
     Upstage Solar Embedding Wrapper (Optimized)
+    - 기본: Upstage 임베딩 HTTP API(configs.yaml의 embedding_url)에 텍스트 리스트를 한 번에 전달 (1회 요청)
+    - use_langchain=True: 기존 LangChain UpstageEmbeddings 경로 사용
+      (None이면 configs.yaml의 use_langchain_embeddings 값 사용)
     """
 
-    def __init__(self, model_name: str = "solar-embedding-1-large"):
-        load_dotenv()
+    def __init__(self, model_name: str = "solar-embedding-1-large", use_langchain: Optional[bool] = None):
+        # .env는 진입점(run.py/server.py)에서 로드
         api_key = os.getenv("UPSTAGE_API_KEY")
         
         if not api_key:
             raise ValueError("UPSTAGE_API_KEY가 설정되지 않았습니다. .env 파일을 확인해주세요.")
 
-        # API Key
-        self.model = UpstageEmbeddings(
-            model=model_name, 
-            upstage_api_key=api_key
+        self.api_key = api_key
+        self.query_model = f"{model_name}-query"
+        self.passage_model = f"{model_name}-passage"
+
+        if use_langchain is None:
+            use_langchain = bool(get_upstage_setting("use_langchain_embeddings"))
+
+        if use_langchain:
+            # LangChain은 fallback 경로에서만 필요하므로 지연 import
+            from langchain_upstage import UpstageEmbeddings
+
+            self.model = UpstageEmbeddings(
+                model=model_name, 
+                upstage_api_key=api_key
+            )
+            embed_query = self.model.embed_query
+        else:
+            self.model = None
+            embed_query = lambda text: self._post_embeddings([text], self.query_model)[0]
+
+        # REPL에서 같은 질문이 반복될 때 API 재호출 방지
+        self._embed_query = lru_cache(maxsize=128)(embed_query)
+
+    def _post_embeddings(self, texts: List[str], model: str) -> List[List[float]]:
+        """
+        Upstage 임베딩 API 직접 호출 (input에 리스트 전달 -> 일괄 임베딩)
+        """
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        resp = SESSION.post(
+            get_upstage_setting("embedding_url"),
+            headers=headers,
+            json={"model": model, "input": texts},
+            timeout=60
         )
+        resp.raise_for_status()
+
+        # 응답 순서가 보장되지 않을 수 있으므로 index 기준으로 정렬
+        data = sorted(resp.json()["data"], key=lambda d: d.get("index", 0))
+        return [d["embedding"] for d in data]
 
-    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.model is not None:
+            return self.model.embed_documents(texts)
+        return self._post_embeddings(texts, self.passage_model)
+
+    def _embed_queries(self, texts: List[str]) -> List[List[float]]:
+        if self.model is not None:
+            # LangChain은 질문 일괄 임베딩을 지원하지 않으므로 동시에 요청
+            with ThreadPoolExecutor(max_workers=min(8, len(texts))) as executor:
+                return list(executor.map(self._embed_query, texts))
+        return self._post_embeddings(texts, self.query_model)
+
+    def encode(self, texts: Union[str, List[str]], is_query: bool = True) -> np.ndarray:
         """
         texts: 질문(Query) 텍스트 또는 텍스트 리스트
+        is_query: True면 질문용(query), False면 문서용(passage) 임베딩
         반환: (N, D) L2 Normalized Numpy Array
         """
         # 1. 단일 문자열을 리스트로 통일
@@ -40,16 +99,73 @@ class SolarEmbedder:
 
         try:
             # 3. 임베딩 생성
-            # RAG 질문용이므로 embed_query 사용
-            vectors = [self.model.embed_query(t) for t in valid_texts]
+            if not is_query:
+                # 문서(청크)는 한 번의 API 요청으로 일괄 임베딩
+                vectors = self._embed_documents(valid_texts)
+            elif len(valid_texts) == 1:
+                vectors = [self._embed_query(valid_texts[0])]
+            else:
+                vectors = self._embed_queries(valid_texts)
 
-            # 4. Numpy 변환
-            arr = np.array(vectors, dtype="float32")
+            # 4. Numpy 변환 (이미 float32면 복사 없음)
+            arr = np.asarray(vectors, dtype="float32")
 
-            # 5. L2 정규화
+            # 5. L2 정규화 (추가 (N, D) 버퍼 없이 in-place)
             norms = np.linalg.norm(arr, axis=1, keepdims=True)
-            return arr / np.clip(norms, 1e-12, None)
+            np.divide(arr, np.maximum(norms, 1e-12), out=arr)
+            return arr
 
         except Exception as e:
             print(f"[Embedding Error] 변환 중 오류 발생: {e}")
-            return np.array([])
\ No newline at end of file
+            return np.array([])
+
+
+class MicroBatchEmbedder:
+    """
+    여러 요청의 질문 임베딩을 짧은 시간 창(window) 동안 모아 한 번에 처리하는 래퍼
+    - 동시 요청이 많은 서버 환경용 (SolarEmbedder와 같은 encode 인터페이스)
+    - 단일 질문 문자열만 배치 대상이며, 나머지는 내부 임베더로 바로 전달
+    """
+
+    def __init__(self, embedder: SolarEmbedder, window_ms: float = 10.0, max_batch: int = 32):
+        self.embedder = embedder
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def encode(self, texts: Union[str, List[str]], is_query: bool = True) -> np.ndarray:
+        if not is_query or not isinstance(texts, str) or not texts.strip():
+            return self.embedder.encode(texts, is_query=is_query)
+
+        future: Future = Future()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            # 1. 첫 요청이 들어오면 시간 창 동안 추가 요청 수집
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # 2. 한 번의 encode 호출로 일괄 임베딩
+            try:
+                arr = self.embedder.encode([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            # 3. 요청별로 (1, D) 결과 분배 (실패 시 빈 배열)
+            for i, (_, future) in enumerate(batch):
+                future.set_result(arr[i:i + 1] if len(arr) == len(batch) else np.array([]))
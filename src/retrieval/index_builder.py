@@ -0,0 +1,104 @@
+# src/retrieval/index_builder.py
+
+"""
+FAISS 인덱스 변환 스크립트
+- 기존 Flat 인덱스(.faiss)의 벡터를 꺼내 압축 인덱스로 재구축
+- ivfpq: IVF-PQ FastScan (4-bit PQ 코드 + SIMD LUT 조회)
+  * BlockInvertedLists를 사용하므로 mmap 불가 (로드 시 전체를 메모리로 읽음)
+- sq8: INT8 Scalar Quantizer (float32 대비 1/4 크기, 검색 시 즉석 역양자화)
+  * IO_FLAG_MMAP_IFC를 지원하는 faiss에서는 mmap 로드 가능
+- 메타데이터(.jsonl)의 순서는 그대로 유지되므로 별도 변환 불필요
+- 질문 임베딩은 float32 그대로 검색에 사용
+
+사용법:
+    python -m src.retrieval.index_builder data/Cancer_cell_merged.faiss data/Cancer_cell_merged_ivfpq.faiss
+    python -m src.retrieval.index_builder data/Cancer_cell_merged.faiss data/Cancer_cell_merged_sq8.faiss --type sq8
+"""
+
+import argparse
+import math
+
+import faiss
+
+
+def _load_vectors(index_path: str):
+    """
+    Flat 인덱스에서 원본 벡터를 복원합니다. (Flat 인덱스는 원본 그대로 보관)
+    """
+    src = faiss.read_index(index_path)
+    if src.ntotal == 0:
+        raise ValueError(f"빈 인덱스는 변환할 수 없습니다: {index_path}")
+    return src, src.reconstruct_n(0, src.ntotal)
+
+
+def convert_to_ivfpq_fastscan(
+    index_path: str,
+    out_path: str,
+    nlist: int = 0,
+    m: int = 0,
+) -> faiss.Index:
+    """
+    Flat 인덱스를 IndexIVFPQFastScan으로 변환하여 저장합니다.
+    nlist: 0이면 sqrt(N), m: 0이면 d // 2 사용
+    주의: FastScan 인덱스는 mmap되지 않으므로 메모리 절감이 필요하면 sq8 사용
+    """
+    # 1. 원본 벡터 복원
+    src, vectors = _load_vectors(index_path)
+    d, ntotal = src.d, src.ntotal
+
+    # 2. 파라미터 결정
+    nlist = nlist or max(1, int(math.sqrt(ntotal)))
+    m = m or max(1, d // 2)
+    if d % m != 0:
+        raise ValueError(f"차원({d})이 PQ 서브벡터 수({m})로 나누어 떨어지지 않습니다.")
+
+    # 3. 학습 및 추가 (원본과 같은 거리 척도 유지)
+    metric = src.metric_type
+    if metric == faiss.METRIC_INNER_PRODUCT:
+        quantizer = faiss.IndexFlatIP(d)
+    else:
+        quantizer = faiss.IndexFlatL2(d)
+
+    index = faiss.IndexIVFPQFastScan(quantizer, d, nlist, m, 4, metric)
+    index.train(vectors)
+    index.add(vectors)
+
+    faiss.write_index(index, out_path)
+    print(f"[FAISS] IVF-PQ FastScan 변환 완료 (nlist={nlist}, M={m}, Docs={index.ntotal}) -> {out_path}")
+    return index
+
+
+def convert_to_sq8(index_path: str, out_path: str) -> faiss.Index:
+    """
+    Flat 인덱스를 INT8 IndexScalarQuantizer로 변환하여 저장합니다.
+    """
+    # 1. 원본 벡터 복원
+    src, vectors = _load_vectors(index_path)
+
+    # 2. 전체 코퍼스로 차원별 범위 학습 후 추가 (원본과 같은 거리 척도 유지)
+    index = faiss.IndexScalarQuantizer(src.d, faiss.ScalarQuantizer.QT_8bit, src.metric_type)
+    index.train(vectors)
+    index.add(vectors)
+
+    faiss.write_index(index, out_path)
+    print(f"[FAISS] SQ8 변환 완료 (Dim={index.d}, Docs={index.ntotal}) -> {out_path}")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flat FAISS 인덱스를 압축 인덱스로 변환")
+    parser.add_argument("index_path", help="기존 .faiss 인덱스 경로")
+    parser.add_argument("out_path", help="변환된 인덱스 저장 경로")
+    parser.add_argument("--type", choices=["ivfpq", "sq8"], default="ivfpq", help="변환할 인덱스 종류")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF 클러스터 수 (기본: sqrt(N), ivfpq 전용)")
+    parser.add_argument("--m", type=int, default=0, help="PQ 서브벡터 수 (기본: d // 2, ivfpq 전용)")
+    args = parser.parse_args()
+
+    if args.type == "sq8":
+        convert_to_sq8(args.index_path, args.out_path)
+    else:
+        convert_to_ivfpq_fastscan(args.index_path, args.out_path, nlist=args.nlist, m=args.m)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# src/retrieval/resources.py
+
+"""
+검색 리소스(임베더 + Vector DB) 로딩 모듈
+- run.py(CLI)와 server.py(API 서버)가 공통으로 사용
+- 임베더 로딩 실패는 예외로 전달하고, 종료 여부는 호출 측에서 결정
+"""
+
+import os
+from typing import Optional, Tuple
+
+from .embeddings import SolarEmbedder
+from .vector_store import FaissIndex
+
+# ---------------------------------------------------
+# 데이터 경로 설정 (단일 경로 통합)
+# ---------------------------------------------------
+INDEX_PATH = "data/Cancer_cell_merged.faiss"
+META_PATH = "data/Cancer_cell_merged.jsonl"
+
+
+def load_resources(
+    index_path: str = INDEX_PATH,
+    meta_path: str = META_PATH
+) -> Tuple[SolarEmbedder, Optional[FaissIndex]]:
+    """
+    임베더와 Vector DB를 로딩합니다.
+    - 임베더 로딩 실패: 예외 발생 (API Key 누락 등)
+    - DB 파일이 없거나 로딩 실패: 경고 후 vector_db=None (검색 기능 없이 실행)
+    """
+    print("\n[System] Initializing Medical AI Advisor...")
+
+    # 1. 임베더 로딩
+    print("[System] Loading Embedder (Solar)...")
+    embedder = SolarEmbedder()
+
+    # 2. Vector DB 로딩
+    vector_db = None
+
+    if os.path.exists(index_path) and os.path.exists(meta_path):
+        print(f"[System] Loading Vector DB form {index_path}...")
+        try:
+            vector_db = FaissIndex(index_path, meta_path)
+        except Exception as e:
+            print(f"[Error] DB 로딩 중 오류 발생: {e}")
+            vector_db = None
+    else:
+        print(f"[Warning] DB 파일을 찾을 수 없습니다 ({index_path}). 검색 기능 없이 실행됩니다.")
+
+    print("[System] Initialization Complete.\n")
+
+    return embedder, vector_db
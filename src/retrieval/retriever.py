@@ -9,8 +9,12 @@ Retrieval 모듈 - Bio-Medical Specialized
 4. Dense Reranking (Context 정확도 향상)
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from typing import List, Dict, Optional
 import re
+import numpy as np
 import wikipediaapi
 
 from .embeddings import SolarEmbedder
@@ -33,12 +37,15 @@ def search_faiss_index(
     embedder: SolarEmbedder,
     index: FaissIndex,
     top_k: int = 5,
-    source_tag: str = "InternalDB"
+    source_tag: str = "InternalDB",
+    q_emb: Optional[np.ndarray] = None
 ) -> List[Dict]:
     """
     FAISS 인덱스에서 유사한 청크를 검색합니다.
+    q_emb가 주어지면 질문 임베딩을 다시 계산하지 않습니다.
     """
-    q_emb = embedder.encode(query)[0]
+    if q_emb is None:
+        q_emb = embedder.encode(query)[0]
     results = index.search(q_emb, top_k=top_k)
     
     # 소스 태그 추가 
@@ -51,16 +58,19 @@ def search_faiss_index(
 # 2. Wikipedia 키워드 추출 (바이오 용어 특화)
 # ---------------------------------------------------------
 
-_STOPWORDS = {
+_STOPWORDS = frozenset({
     "what", "which", "that", "this", "these", "those",
     "who", "whom", "whose", "where", "when", "why", "how",
     "does", "do", "did", "is", "are", "was", "were", "be",
     "an", "a", "the", "of", "and", "or", "in", "on", "for",
     "to", "from", "with", "as", "by", "about", "describe", "explain"
-}
+})
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9\-']*")
+_LINE_RE = re.compile(r"[^\n]+")
 
 def _tokenize_bio(text: str) -> List[str]:
-    tokens = re.findall(r"[A-Za-z0-9][A-Za-z0-9\-']*", text)
+    tokens = _TOKEN_RE.findall(text)
     return [t for t in tokens if t.strip()]
 
 def extract_candidate_titles(query: str, max_candidates: int = 5) -> List[str]:
@@ -68,7 +78,7 @@ def extract_candidate_titles(query: str, max_candidates: int = 5) -> List[str]:
     질문에서 위키백과 검색용 키워드(타이틀 후보)를 추출합니다.
     """
     tokens = _tokenize_bio(query)
-    if not tokens:
+    if not tokens or max_candidates <= 0:
         return []
 
     tokens_lower = [t.lower() for t in tokens]
@@ -89,22 +99,39 @@ def extract_candidate_titles(query: str, max_candidates: int = 5) -> List[str]:
         if len(t) >= 4 or any(c.isdigit() for c in t) or t.isupper():
             candidates.append(t)
 
-    # 중복 제거 및 정렬
+    # 중복 제거 (대소문자 무시) 후 최대 개수에 도달하면 중단
     seen = set()
     final_candidates = []
     for c in candidates:
-        # Wikipedia 형식에 맞게 Title Case 변환
-        c_fmt = c.title() if not c.isupper() else c
-        if c_fmt not in seen:
-            seen.add(c_fmt)
-            final_candidates.append(c_fmt)
+        key = c.casefold()
+        if key in seen:
+            continue
+        seen.add(key)
+        # Wikipedia 형식에 맞게 Title Case 변환 (약어/유전자 기호는 그대로 유지, 예: PD-1)
+        if c.isupper() or any(ch.isdigit() for ch in c):
+            final_candidates.append(c)
+        else:
+            final_candidates.append(c.title())
+        if len(final_candidates) >= max_candidates:
+            break
 
-    return final_candidates[:max_candidates]
+    return final_candidates
 
 # ---------------------------------------------------------
 # 3. Wikipedia 검색 실행
 # ---------------------------------------------------------
 
+@lru_cache(maxsize=512)
+def _fetch_page(title: str) -> Optional[str]:
+    """
+    위키백과 본문을 가져옵니다. 페이지가 없으면 None.
+    REPL에서 같은 타이틀을 다시 요청하지 않도록 캐싱합니다.
+    """
+    page = wiki.page(title)
+    if not page.exists():
+        return None
+    return page.text
+
 def search_wikipedia_chunks(query: str, max_pages: int = 3) -> List[Dict]:
     """
     추출된 키워드로 위키백과를 검색하고 본문을 가져옵니다.
@@ -115,16 +142,18 @@ def search_wikipedia_chunks(query: str, max_pages: int = 3) -> List[Dict]:
     if not candidates:
         return chunks
 
-    for title in candidates:
-        page = wiki.page(title)
-        if not page.exists():
+    # 페이지 요청은 서로 독립적이므로 동시에 가져옴
+    with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        page_texts = list(executor.map(_fetch_page, candidates))
+
+    for title, page_text in zip(candidates, page_texts):
+        if page_text is None:
             continue
 
-        # 문단 단위 분할
-        paragraphs = [p for p in page.text.split("\n") if len(p.strip()) > 50]
-        
-        # 상위 3개 문단만 사용
-        for p in paragraphs[:3]:
+        # 문단 단위로 순회하며 상위 3개 문단만 사용 (본문 전체를 split하지 않음)
+        paragraphs = (m.group() for m in _LINE_RE.finditer(page_text))
+        long_paragraphs = (p for p in paragraphs if len(p.strip()) > 50)
+        for p in islice(long_paragraphs, 3):
             chunks.append({
                 "text": p,
                 "source": f"Wikipedia ({title})",
@@ -141,71 +170,127 @@ def rerank_results(
     query: str,
     candidates: List[Dict],
     embedder: SolarEmbedder,
-    top_k: int = 8
+    top_k: int = 8,
+    q_emb: Optional[np.ndarray] = None
 ) -> List[Dict]:
     """
     다양한 소스(FAISS, Wiki)에서 가져온 청크들을 
     질문과의 유사도 순으로 다시 정렬합니다.
+    q_emb가 주어지면 질문 임베딩을 다시 계산하지 않습니다.
     """
     if not candidates:
         return []
 
-    q_emb = embedder.encode(query)[0]
-    
-    scored_items = []
-    for item in candidates:
-        # 텍스트 임베딩 계산
-        c_text = item.get("text", "")
-        c_emb = embedder.encode(c_text)[0]
-        
-        # 코사인 유사도 계산
-        score = float((q_emb * c_emb).sum())
-        item["score"] = score
-        scored_items.append(item)
+    if q_emb is None:
+        q_emb = embedder.encode(query)[0]
 
-    # 점수 내림차순 정렬
-    scored_items.sort(key=lambda x: x["score"], reverse=True)
-    
-    return scored_items[:top_k]
+    # 텍스트가 있는 청크만 한 번의 호출로 일괄 임베딩 -> (N, D)
+    scored_items = [item for item in candidates if item.get("text", "").strip()]
+    if not scored_items:
+        return []
+
+    cand_matrix = embedder.encode([item["text"] for item in scored_items], is_query=False)
+    if len(cand_matrix) != len(scored_items):
+        # 임베딩 실패 시 재정렬 없이 반환 (FAISS 원점수는 코사인 유사도가 아닐 수 있으므로 제거)
+        return [
+            {k: v for k, v in item.items() if k != "score"}
+            for item in scored_items[:top_k]
+        ]
+
+    # 코사인 유사도 계산 (정규화된 벡터의 내적, 단일 GEMV)
+    cand_matrix = cand_matrix.astype(np.float32, copy=False)
+    scores = cand_matrix @ q_emb.astype(np.float32, copy=False)
+
+    # 상위 top_k개만 골라서 점수 내림차순 정렬
+    if top_k < len(scores):
+        top_idx = np.argpartition(-scores, top_k)[:top_k]
+    else:
+        top_idx = np.arange(len(scores))
+    top_idx = top_idx[np.argsort(-scores[top_idx], kind="stable")]
+
+    # 원본 청크는 수정하지 않고 점수를 포함한 새 dict로 반환
+    return [scored_items[i] | {"score": float(scores[i])} for i in top_idx]
 
 # ---------------------------------------------------------
 # 5. Main Context Builder
 # ---------------------------------------------------------
 
+def _encode_query(query: str, embedder: SolarEmbedder) -> Optional[np.ndarray]:
+    """
+    질문 임베딩 (D,) 반환. 임베딩 실패로 빈 배열이 오면 None.
+    """
+    q_embs = embedder.encode(query)
+    if len(q_embs) == 0:
+        return None
+    return q_embs[0]
+
 def get_relevant_context(
     query: str,
     embedder: SolarEmbedder,
     vector_db: Optional[FaissIndex] = None,
-    use_wiki: bool = True
+    use_wiki: bool = True,
+    max_chunk_chars: int = 800,
+    max_context_chars: int = 4000,
+    min_score_ratio: float = 0.5
 ) -> str:
     """
     최종 RAG Context 생성 함수
+    - 청크당 max_chunk_chars, 전체 max_context_chars 글자로 제한 (높은 점수 우선)
+    - 최고 점수의 min_score_ratio 배 미만인 청크는 제외
     """
     
     all_chunks = []
 
+    # 질문 임베딩은 필요할 때 한 번만 계산하여 FAISS 검색과 Reranking에서 공유
+    q_emb = None
+
     # 1. 참고 자료 데이터베이스(논문,연구 등)
     if vector_db:
-        guideline_chunks = search_faiss_index(
-            query, embedder, vector_db, top_k=4, source_tag="Paper_DB"
-        )
-        all_chunks.extend(guideline_chunks)
+        q_emb = _encode_query(query, embedder)
+        if q_emb is not None:
+            guideline_chunks = search_faiss_index(
+                query, embedder, vector_db, top_k=4, source_tag="Paper_DB", q_emb=q_emb
+            )
+            all_chunks.extend(guideline_chunks)
 
     # 2. 위키백과 검색 (배경 지식 보완)
     if use_wiki:
         wiki_chunks = search_wikipedia_chunks(query, max_pages=2)
         all_chunks.extend(wiki_chunks)
 
+    # 검색 결과가 있을 때만 임베딩 (FAISS 단계에서 이미 시도했다면 재요청하지 않음)
+    if all_chunks and q_emb is None and not vector_db:
+        q_emb = _encode_query(query, embedder)
+
     # 3. 통합 Reranking
     # 검색된 모든 문서 중 질문과 가장 관련성 높은 순서로 정렬
-    best_chunks = rerank_results(query, all_chunks, embedder, top_k=6)
+    if q_emb is not None:
+        best_chunks = rerank_results(query, all_chunks, embedder, top_k=6, q_emb=q_emb)
+    else:
+        # 질문 임베딩 실패 시 재정렬 없이 사용
+        best_chunks = all_chunks[:6]
 
     # 4. 프롬프트 주입용 텍스트 생성
+    # 같은 Context가 LLM 4회 호출에 모두 들어가므로 점수 순으로 길이 제한
+    top_score = best_chunks[0].get("score") if best_chunks else None
     formatted_context = []
+    total_chars = 0
     for chunk in best_chunks:
+        score = chunk.get("score")
+        if top_score is not None and top_score > 0 and score is not None:
+            if score < top_score * min_score_ratio:
+                continue
+
         source = chunk.get("source", "Unknown")
         text = chunk.get("text", "").strip()
-        formatted_context.append(f"[{source}]\n{text}")
+        if len(text) > max_chunk_chars:
+            text = text[:max_chunk_chars].rsplit(" ", 1)[0] + "..."
+
+        entry = f"[{source}]\n{text}"
+        if formatted_context and total_chars + len(entry) > max_context_chars:
+            break
+        formatted_context.append(entry)
+        total_chars += len(entry)
 
     if not formatted_context:
         return "No relevant documents found."
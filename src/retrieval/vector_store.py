@@ -1,18 +1,53 @@
 # src/retrieval/vector_store.py
 
 import faiss
-import numpy as np
 import json
+import numpy as np
 import os
 from typing import List, Dict
 
+try:
+    import orjson  # C 구현 JSON 파서 (빠른 메타데이터 로드)
+except ImportError:
+    orjson = None
+
+
+def _loads_meta(line: bytes) -> Dict:
+    """
+    JSONL 한 줄 파싱
+    orjson은 NaN/Infinity, 64비트를 넘는 정수를 거부하므로 해당 줄만 표준 json으로 재시도
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(line)
+
+# 인덱스 파일 첫 4바이트(fourcc)로 인덱스 종류 판별
+_FLAT_CODES_FOURCC = {b"IxFI", b"IxF2", b"IxFl", b"IxSQ", b"IxSq", b"IxPq", b"IxPo"}
+_IVF_FOURCC_PREFIX = (b"Iv", b"Iw")
+
+def _mmap_flags(index_path: str) -> int:
+    """
+    인덱스 종류에 맞는 mmap 플래그 반환 (해당 없음: 0)
+    """
+    with open(index_path, "rb") as f:
+        fourcc = f.read(4)
+
+    if fourcc.startswith(_IVF_FOURCC_PREFIX):
+        return faiss.IO_FLAG_MMAP
+    if fourcc in _FLAT_CODES_FOURCC:
+        return getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    return 0
+
 class FaissIndex:
     """
     FAISS index + metadata(jsonl) 로더
     - 역할: .faiss 인덱스와 .jsonl 메타데이터를 연결하여 검색 수행
     """
 
-    def __init__(self, index_path: str, meta_path: str):
+    def __init__(self, index_path: str, meta_path: str, nprobe: int = 16):
         self.index_path = index_path
         self.meta_path = meta_path
 
@@ -21,14 +56,26 @@ class FaissIndex:
             raise FileNotFoundError(f"DB 파일을 찾을 수 없습니다: {index_path} 또는 {meta_path}")
 
         # 2. FAISS 인덱스 메모리 매핑 로드
-        self.index = faiss.read_index(index_path)
+        # 두 플래그를 함께 주면 IVF 인덱스 로드가 실패하므로 인덱스 종류별로 하나만 사용
+        # - Flat / SQ8 (IndexFlatCodes): IO_FLAG_MMAP_IFC (지원하는 faiss 버전만, 없으면 일반 로드)
+        # - IVF-Flat / IVF-PQ: IO_FLAG_MMAP (inverted list mmap)
+        # - IVF-PQ FastScan: BlockInvertedLists라 mmap되지 않고 전체를 메모리로 읽어옴
+        io_flags = _mmap_flags(index_path)
+        try:
+            self.index = faiss.read_index(index_path, io_flags)
+        except RuntimeError as e:
+            print(f"[FAISS] mmap 로드(io_flags={io_flags}) 실패, 일반 로드로 전환합니다: {e}")
+            self.index = faiss.read_index(index_path)
+
+        # IVF 계열 인덱스라면 탐색할 클러스터 수(nprobe) 설정
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            ivf.nprobe = nprobe
 
         # 3. 메타데이터 로드
-        self.metadata = []
-        with open(meta_path, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip(): # 빈 줄 에러 방지
-                    self.metadata.append(json.loads(line))
+        # 바이너리로 읽어 디코딩 없이 바로 파싱 (빈 줄 에러 방지)
+        with open(meta_path, "rb") as f:
+            self.metadata = [_loads_meta(line) for line in f if line.strip()]
 
         print(f"[FAISS] Index 로드 완료 (Dim: {self.index.d}, Docs: {self.index.ntotal})")
         print(f"[META]  {len(self.metadata)}개 메타데이터 로드 완료")
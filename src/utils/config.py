@@ -0,0 +1,47 @@
+# src/utils/config.py
+
+"""
+공통 설정 모듈
+- configs.yaml 로드 (LLM / 임베딩 모듈이 함께 사용)
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict
+
+import yaml
+
+# 실행 위치(cwd)와 무관하게 프로젝트 루트의 configs.yaml 사용
+CONFIG_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "configs.yaml")
+)
+
+_DEFAULT_CFG = {
+    "upstage": {
+        "base_url": "https://api.upstage.ai/v1/chat/completions",
+        "model_name": "solar-pro2",
+        "embedding_url": "https://api.upstage.ai/v1/solar/embeddings",
+        "use_langchain_embeddings": False,
+    }
+}
+
+
+@lru_cache(maxsize=None)
+def get_config() -> Dict:
+    """
+    configs.yaml을 한 번만 읽어 캐싱합니다. (파일이 없으면 기본값 사용)
+    설정값은 호출 시점마다 get_config()로 읽으므로
+    테스트 등에서 설정을 바꾸려면 get_config.cache_clear()만 호출하면 됩니다.
+    """
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f)
+    except FileNotFoundError:
+        return _DEFAULT_CFG
+
+
+def get_upstage_setting(key: str):
+    """
+    upstage 섹션의 설정값 (configs.yaml에 없으면 기본값)
+    """
+    return get_config().get("upstage", {}).get(key, _DEFAULT_CFG["upstage"][key])
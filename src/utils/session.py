@@ -0,0 +1,25 @@
+# src/utils/session.py
+
+"""
+공통 HTTP 세션 모듈
+- Chat / Embedding API 호출이 keep-alive 연결(TLS 핸드셰이크 1회)과 재시도 정책을 공유
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 연결 실패와 429/5xx 응답만 지수 백오프로 재시도
+# (읽기 오류/타임아웃은 생성이 이미 진행됐을 수 있어 중복 과금 방지를 위해 재시도하지 않음)
+_RETRY = Retry(
+    total=3,
+    read=0,
+    other=0,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=frozenset({"POST"}),
+    raise_on_status=False,
+)
+
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=_RETRY))